@@ -1,52 +1,109 @@
 //! Git repository utilities for path detection and resolution
 
-use anyhow::{bail, Context};
+use anyhow::{anyhow, bail, Context};
 use std::{
-    env,
+    env, fs, io,
     path::{Path, PathBuf},
-    process::Command,
+    process::{Command, Output},
     sync::OnceLock,
 };
 
-/// Cache for git directory path
-static GIT_DIR_CACHE: OnceLock<PathBuf> = OnceLock::new();
+/// Cache for the git directory, git common directory and repository root,
+/// including the reason for any of them that couldn't be determined
+static GIT_PATHS_CACHE: OnceLock<GitPaths> = OnceLock::new();
 
-/// Cache for git common directory path
-static GIT_COMMON_DIR_CACHE: OnceLock<PathBuf> = OnceLock::new();
+/// Cache for global gitignore path (`None` if no global gitignore was found)
+static GLOBAL_GITIGNORE_CACHE: OnceLock<Option<PathBuf>> = OnceLock::new();
 
-/// Cache for repository root path
-static REPO_ROOT_CACHE: OnceLock<PathBuf> = OnceLock::new();
+/// Cache for the git executable resolved from PATH
+static GIT_EXECUTABLE_CACHE: OnceLock<PathBuf> = OnceLock::new();
 
-/// Execute git command and return stdout
-fn run_git_command(args: &[&str]) -> anyhow::Result<String> {
-    let output = Command::new("git")
+/// Check that a PATH candidate is a file the OS would execute
+#[cfg(unix)]
+fn is_executable(path: &Path) -> bool {
+    use std::os::unix::fs::PermissionsExt;
+    fs::metadata(path).is_ok_and(|m| m.is_file() && m.permissions().mode() & 0o111 != 0)
+}
+
+#[cfg(not(unix))]
+fn is_executable(path: &Path) -> bool {
+    path.is_file()
+}
+
+/// Get the git executable, searching PATH only on first use.
+///
+/// Falls back to a bare `git` (leaving the lookup to the OS at spawn time)
+/// if no absolute PATH entry contains it, so the spawn error is unchanged.
+fn git_executable() -> &'static Path {
+    GIT_EXECUTABLE_CACHE.get_or_init(|| {
+        let name = format!("git{}", env::consts::EXE_SUFFIX);
+        env::var_os("PATH")
+            .and_then(|paths| {
+                env::split_paths(&paths)
+                    .filter(|dir| dir.is_absolute())
+                    .map(|dir| dir.join(&name))
+                    .find(|path| is_executable(path))
+            })
+            .unwrap_or_else(|| PathBuf::from("git"))
+    })
+}
+
+/// Spawn a git command and collect its output, whatever its exit status
+fn git_output(args: &[&str]) -> anyhow::Result<Output> {
+    Command::new(git_executable())
         .args(args)
         .output()
-        .with_context(|| "Git not found in PATH")?;
+        .with_context(|| "Git not found in PATH")
+}
 
-    if !output.status.success() {
-        let stderr = String::from_utf8_lossy(&output.stderr);
-        let cwd = env::current_dir().unwrap_or_else(|_| PathBuf::from("."));
+/// Describe a failed git command from its stderr
+fn git_failure_message(stderr: &[u8]) -> String {
+    let stderr = String::from_utf8_lossy(stderr);
+    let cwd = env::current_dir().unwrap_or_else(|_| PathBuf::from("."));
 
-        bail!(
-            "Not in a git repository (cwd: {}): {}",
-            cwd.display(),
-            stderr.trim()
-        );
+    format!(
+        "Not in a git repository (cwd: {}): {}",
+        cwd.display(),
+        stderr.trim()
+    )
+}
+
+/// Execute git command and return stdout
+fn run_git_command(args: &[&str]) -> anyhow::Result<String> {
+    let output = git_output(args)?;
+
+    if !output.status.success() {
+        bail!(git_failure_message(&output.stderr));
     }
 
-    let stdout = String::from_utf8_lossy(&output.stdout);
-    let result = stdout.trim();
+    // Trim in place so the captured stdout buffer becomes the returned String
+    let mut result = String::from_utf8(output.stdout)
+        .unwrap_or_else(|e| String::from_utf8_lossy(e.as_bytes()).into_owned());
+    result.truncate(result.trim_end().len());
+    let leading_whitespace = result.len() - result.trim_start().len();
+    result.drain(..leading_whitespace);
 
     if result.is_empty() {
         bail!("Git command returned empty output: git {}", args.join(" "));
     }
 
-    Ok(result.to_string())
+    Ok(result)
 }
 
 /// Validate that git returned a reasonable path
-fn validate_git_path(path: &Path) -> anyhow::Result<PathBuf> {
+///
+/// `--absolute-git-dir` and `--show-toplevel` already report absolute,
+/// symlink-free paths, so those only need to exist. Relative paths (such as
+/// `--git-common-dir` in the main work tree) are resolved against the current
+/// directory.
+fn validate_git_path(path: PathBuf) -> anyhow::Result<PathBuf> {
+    if path.is_absolute() {
+        if !path.exists() {
+            bail!("Invalid path returned by git: {}", path.display());
+        }
+        return Ok(path);
+    }
+
     let resolved = path
         .canonicalize()
         .with_context(|| format!("Invalid path returned by git: {}", path.display()))?;
@@ -54,24 +111,243 @@ fn validate_git_path(path: &Path) -> anyhow::Result<PathBuf> {
     Ok(resolved)
 }
 
-/// Resolve a path-valued `git rev-parse <rev_parse_arg>` invocation, caching
-/// the validated result.
-fn cached_git_path(
-    cache: &OnceLock<PathBuf>,
-    rev_parse_arg: &str,
-    error_context: &'static str,
-) -> anyhow::Result<PathBuf> {
-    if let Some(cached) = cache.get() {
-        return Ok(cached.clone());
+/// Environment variables that change how git locates the repository. When any
+/// of them is set, repository discovery is left to git itself.
+const GIT_DISCOVERY_ENV_VARS: &[&str] = &[
+    "GIT_DIR",
+    "GIT_WORK_TREE",
+    "GIT_COMMON_DIR",
+    "GIT_CEILING_DIRECTORIES",
+    "GIT_DISCOVERY_ACROSS_FILESYSTEM",
+    // `git -c ...` passes config to subcommands such as `git ignore`
+    "GIT_CONFIG_PARAMETERS",
+    "GIT_CONFIG_COUNT",
+];
+
+/// A resolved git path, or why it couldn't be resolved
+///
+/// Failures are kept as their message so the outcome can be cached and
+/// reported again on every lookup without re-running git.
+type GitPath = Result<PathBuf, String>;
+
+/// Git directory, git common directory and repository root
+#[derive(Debug, PartialEq)]
+struct GitPaths {
+    git_dir: GitPath,
+    git_common_dir: GitPath,
+    repo_root: GitPath,
+}
+
+impl GitPaths {
+    /// All three paths found, as in a repository with a work tree
+    fn found(git_dir: PathBuf, git_common_dir: PathBuf, repo_root: PathBuf) -> Self {
+        GitPaths {
+            git_dir: Ok(git_dir),
+            git_common_dir: Ok(git_common_dir),
+            repo_root: Ok(repo_root),
+        }
     }
 
-    let output = run_git_command(&["rev-parse", rev_parse_arg]).context(error_context)?;
-    let path = PathBuf::from(output);
-    let validated = validate_git_path(&path)?;
+    /// None of the paths could be determined, e.g. outside any repository
+    fn failed(message: String) -> Self {
+        GitPaths {
+            git_dir: Err(message.clone()),
+            git_common_dir: Err(message.clone()),
+            repo_root: Err(message),
+        }
+    }
+}
 
-    // Only cache if we succeed
-    let _ = cache.set(validated.clone());
-    Ok(validated)
+/// Check whether a repository's config moves its work tree or marks it bare,
+/// either of which git must interpret.
+///
+/// Only the keys that affect discovery are looked at: `core.worktree`, a
+/// `core.bare` that isn't false, and `extensions.worktreeConfig` (which lets
+/// `config.worktree` set either of them). Includes may set anything, so any
+/// `[include]` or `[includeIf]` section also counts.
+fn config_overrides_discovery(config: &str) -> bool {
+    let mut section = String::new();
+
+    for line in config.lines() {
+        let mut line = line.trim();
+
+        if let Some(header) = line.strip_prefix('[') {
+            let Some((name, rest)) = header.split_once(']') else {
+                // Not something this scan understands, let git read it
+                return true;
+            };
+            // `[includeIf "gitdir:..."]` names the section before the
+            // subsection; keys may follow the header on the same line
+            section = name
+                .split(|c: char| c.is_whitespace() || c == '"')
+                .next()
+                .unwrap_or_default()
+                .to_ascii_lowercase();
+            if section == "include" || section == "includeif" {
+                return true;
+            }
+            line = rest.trim();
+        }
+
+        if line.is_empty() || line.starts_with(['#', ';']) {
+            continue;
+        }
+
+        let (key, value) = match line.split_once('=') {
+            Some((key, value)) => (key.trim(), Some(value)),
+            None => (line, None),
+        };
+        match (section.as_str(), key.to_ascii_lowercase().as_str()) {
+            ("core", "worktree") | ("extensions", "worktreeconfig") => return true,
+            ("core", "bare") if !is_false_config_value(value) => return true,
+            _ => {}
+        }
+    }
+
+    false
+}
+
+/// Check whether a boolean config value is false. A key without `=` is true.
+fn is_false_config_value(value: Option<&str>) -> bool {
+    let Some(value) = value else {
+        return false;
+    };
+    let value = value
+        .split(['#', ';'])
+        .next()
+        .unwrap_or_default()
+        .trim()
+        .trim_matches('"');
+    ["false", "no", "off", "0", ""]
+        .iter()
+        .any(|false_value| value.eq_ignore_ascii_case(false_value))
+}
+
+/// Locate the repository containing `start` without spawning git.
+///
+/// Walks up from `start` looking for a `.git` entry. Only the plain layout is
+/// handled: a real `.git` directory at the top of the work tree, which is also
+/// its own common directory, owned by `uid` like the work tree around it.
+/// Everything else returns `None` so the caller can defer to git:
+/// - worktrees and submodules (`.git` files) and symlinked `.git` directories
+/// - starting inside the git directory, or reaching another filesystem
+/// - a repository owned by another user, which only git's `safe.directory`
+///   check can decide on
+/// - a config that moves the work tree or marks the repository bare
+#[cfg(unix)]
+fn find_git_paths_from(start: &Path, uid: u32) -> Option<GitPaths> {
+    use std::os::unix::fs::MetadataExt;
+
+    let start_device = fs::metadata(start).ok()?.dev();
+
+    for dir in start.ancestors() {
+        let dir_metadata = fs::metadata(dir).ok()?;
+        if dir_metadata.dev() != start_device {
+            return None;
+        }
+
+        let dot_git = dir.join(".git");
+        match fs::symlink_metadata(&dot_git) {
+            Ok(metadata) if metadata.is_dir() => {
+                if metadata.uid() != uid
+                    || dir_metadata.uid() != uid
+                    || start.starts_with(&dot_git)
+                    || !dot_git.join("HEAD").is_file()
+                {
+                    return None;
+                }
+
+                let config = fs::read_to_string(dot_git.join("config")).ok()?;
+                if config_overrides_discovery(&config) {
+                    return None;
+                }
+
+                return Some(GitPaths::found(dot_git.clone(), dot_git, dir.to_path_buf()));
+            }
+            Err(e) if e.kind() == io::ErrorKind::NotFound => continue,
+            _ => return None,
+        }
+    }
+
+    None
+}
+
+/// Locate the repository containing the current directory without spawning git
+///
+/// Only available on unix, where repository ownership can be compared with
+/// the current user the way git does before trusting a repository.
+#[cfg(unix)]
+fn find_git_paths_native() -> Option<GitPaths> {
+    if GIT_DISCOVERY_ENV_VARS
+        .iter()
+        .any(|var| env::var_os(var).is_some())
+    {
+        return None;
+    }
+
+    let cwd = env::current_dir().ok()?.canonicalize().ok()?;
+    // SAFETY: geteuid has no preconditions and cannot fail
+    let euid = unsafe { libc::geteuid() };
+    find_git_paths_from(&cwd, euid)
+}
+
+#[cfg(not(unix))]
+fn find_git_paths_native() -> Option<GitPaths> {
+    None
+}
+
+/// Query the git directory, git common directory and repository root with a
+/// single `git rev-parse` invocation.
+///
+/// rev-parse prints each path as it goes, so when it fails part way the
+/// paths already printed are still used: in a bare repository, or inside the
+/// git directory, the git directories are found and only `--show-toplevel`
+/// fails. Outside any repository nothing is printed and every path fails with
+/// git's error.
+fn query_git_paths() -> GitPaths {
+    let output = match git_output(&[
+        "rev-parse",
+        "--absolute-git-dir",
+        "--git-common-dir",
+        "--show-toplevel",
+    ]) {
+        Ok(output) => output,
+        Err(e) => return GitPaths::failed(format!("{e:#}")),
+    };
+
+    let stdout = String::from_utf8_lossy(&output.stdout);
+    let failure = (!output.status.success()).then(|| git_failure_message(&output.stderr));
+    let mut lines = stdout.lines();
+    let mut next_path = || match lines.next() {
+        Some(line) => validate_git_path(PathBuf::from(line)).map_err(|e| format!("{e:#}")),
+        None => Err(failure
+            .clone()
+            .unwrap_or_else(|| format!("Unexpected output from git rev-parse: {stdout}"))),
+    };
+
+    GitPaths {
+        git_dir: next_path(),
+        git_common_dir: next_path(),
+        repo_root: next_path(),
+    }
+}
+
+/// Resolve the git directory, git common directory and repository root on
+/// first use.
+///
+/// The plain repository layout is found by walking the filesystem; everything
+/// else costs a single `git rev-parse`, whose outcome (including failure) is
+/// cached so git never runs more than once per process.
+fn git_paths() -> &'static GitPaths {
+    GIT_PATHS_CACHE.get_or_init(|| find_git_paths_native().unwrap_or_else(query_git_paths))
+}
+
+/// Look up one of the cached git paths, adding `error_context` on failure
+fn cached_git_path(path: &GitPath, error_context: &'static str) -> anyhow::Result<PathBuf> {
+    match path {
+        Ok(path) => Ok(path.clone()),
+        Err(message) => Err(anyhow!(message.clone()).context(error_context)),
+    }
 }
 
 /// Get the absolute path to the git directory (.git folder or file).
@@ -82,11 +358,7 @@ fn cached_git_path(
 /// shared location regardless of which worktree is active (e.g.
 /// `info/exclude`), use `get_git_common_dir` instead.
 pub fn get_git_dir() -> anyhow::Result<PathBuf> {
-    cached_git_path(
-        &GIT_DIR_CACHE,
-        "--absolute-git-dir",
-        "Failed to find git directory",
-    )
+    cached_git_path(&git_paths().git_dir, "Failed to find git directory")
 }
 
 /// Get the absolute path to the git common directory.
@@ -98,32 +370,38 @@ pub fn get_git_dir() -> anyhow::Result<PathBuf> {
 /// it against this path rather than `get_git_dir`.
 pub fn get_git_common_dir() -> anyhow::Result<PathBuf> {
     cached_git_path(
-        &GIT_COMMON_DIR_CACHE,
-        "--git-common-dir",
+        &git_paths().git_common_dir,
         "Failed to find git common directory",
     )
 }
 
 /// Get the absolute path to the repository root
 pub fn get_repo_root() -> anyhow::Result<PathBuf> {
-    cached_git_path(
-        &REPO_ROOT_CACHE,
-        "--show-toplevel",
-        "Failed to find repository root",
-    )
+    cached_git_path(&git_paths().repo_root, "Failed to find repository root")
 }
 
 /// Get path to global gitignore file
+///
+/// The lookup runs `git config` and probes several default locations, so the
+/// result is cached for the lifetime of the process.
 pub fn get_global_gitignore_path() -> Option<PathBuf> {
+    GLOBAL_GITIGNORE_CACHE
+        .get_or_init(find_global_gitignore_path)
+        .clone()
+}
+
+/// Locate the global gitignore file from git config or the default locations
+fn find_global_gitignore_path() -> Option<PathBuf> {
+    // Look HOME up once; both the configured path and the defaults need it
+    let home = env::var_os("HOME").map(PathBuf::from);
+
     // Try to get configured global gitignore
     if let Ok(output) = run_git_command(&["config", "--global", "core.excludesfile"]) {
         let path = PathBuf::from(output);
-        let expanded = if path.starts_with("~") {
-            let home = env::var_os("HOME")?;
-            PathBuf::from(home).join(path.strip_prefix("~").unwrap())
+        let expanded = if let Ok(rest) = path.strip_prefix("~") {
+            home.as_ref()?.join(rest)
         } else if !path.is_absolute() {
-            let home = env::var_os("HOME")?;
-            PathBuf::from(home).join(&path)
+            home.as_ref()?.join(&path)
         } else {
             path
         };
@@ -141,9 +419,7 @@ pub fn get_global_gitignore_path() -> Option<PathBuf> {
         }
     }
 
-    if let Some(home) = env::var_os("HOME") {
-        let home_path = PathBuf::from(&home);
-
+    if let Some(home_path) = &home {
         let path = home_path.join(".config").join("git").join("ignore");
         if path.exists() {
             return Some(path);
@@ -165,20 +441,24 @@ pub fn get_global_gitignore_path() -> Option<PathBuf> {
 
 /// Get path to repository's .git/info/exclude file
 pub fn get_exclude_file_path() -> anyhow::Result<PathBuf> {
-    let git_common_dir = get_git_common_dir()?;
-    Ok(git_common_dir.join("info").join("exclude"))
+    // Extend the owned path in place instead of allocating one per join
+    let mut path = get_git_common_dir()?;
+    path.extend(["info", "exclude"]);
+    Ok(path)
 }
 
 /// Get path to repository's .gitignore file
 pub fn get_gitignore_path() -> anyhow::Result<PathBuf> {
-    let repo_root = get_repo_root()?;
-    Ok(repo_root.join(".gitignore"))
+    let mut path = get_repo_root()?;
+    path.push(".gitignore");
+    Ok(path)
 }
 
 #[cfg(test)]
 mod tests {
     use super::*;
     use std::env;
+    use tempfile::TempDir;
 
     #[test]
     fn test_run_git_command_failure() {
@@ -186,17 +466,142 @@ mod tests {
         assert!(result.is_err());
     }
 
+    #[test]
+    fn test_git_executable_is_cached() {
+        let first = git_executable();
+        assert!(std::ptr::eq(first, git_executable()));
+        assert!(
+            first.ends_with(format!("git{}", env::consts::EXE_SUFFIX)) || first == Path::new("git")
+        );
+    }
+
     #[test]
     fn test_validate_git_path() {
         let current_dir = env::current_dir().unwrap();
-        let result = validate_git_path(&current_dir);
+        let result = validate_git_path(current_dir);
         assert!(result.is_ok());
 
-        let invalid_path = Path::new("/nonexistent/path/that/should/not/exist");
+        let invalid_path = PathBuf::from("/nonexistent/path/that/should/not/exist");
         let result = validate_git_path(invalid_path);
         assert!(result.is_err());
     }
 
+    #[test]
+    fn test_git_paths() {
+        // The crate is developed inside a git checkout, but packaged sources
+        // may not be; only check consistency when discovery succeeds.
+        if let Ok(repo_root) = get_repo_root() {
+            assert!(repo_root.is_dir());
+            assert!(get_git_dir().unwrap().is_dir());
+            assert!(get_git_common_dir().unwrap().is_dir());
+        }
+        assert!(std::ptr::eq(git_paths(), git_paths()));
+    }
+
+    #[test]
+    fn test_cached_git_path_failure() {
+        let err = cached_git_path(
+            &Err("Not in a git repository".to_string()),
+            "Failed to find repository root",
+        )
+        .unwrap_err();
+        assert_eq!(err.to_string(), "Failed to find repository root");
+        assert_eq!(
+            format!("{err:#}"),
+            "Failed to find repository root: Not in a git repository"
+        );
+    }
+
+    /// Create a minimal plain repository layout, returning its canonical root
+    /// and the uid that owns it
+    #[cfg(unix)]
+    fn plain_repo(temp_dir: &TempDir, config: &str) -> (PathBuf, u32) {
+        use std::os::unix::fs::MetadataExt;
+
+        let root = temp_dir.path().canonicalize().unwrap();
+        let git_dir = root.join(".git");
+        fs::create_dir_all(&git_dir).unwrap();
+        fs::write(git_dir.join("HEAD"), "ref: refs/heads/main\n").unwrap();
+        fs::write(git_dir.join("config"), config).unwrap();
+
+        let uid = fs::metadata(&root).unwrap().uid();
+        (root, uid)
+    }
+
+    #[cfg(unix)]
+    #[test]
+    fn test_find_git_paths_from() {
+        let temp_dir = TempDir::new().unwrap();
+        let (root, uid) = plain_repo(&temp_dir, "[core]\n\tbare = false\n");
+        let git_dir = root.join(".git");
+        let nested = root.join("src").join("nested");
+        fs::create_dir_all(&nested).unwrap();
+
+        let expected = Some(GitPaths::found(
+            git_dir.clone(),
+            git_dir.clone(),
+            root.clone(),
+        ));
+        assert_eq!(find_git_paths_from(&root, uid), expected);
+        assert_eq!(find_git_paths_from(&nested, uid), expected);
+
+        // Inside the git directory itself, git decides what applies
+        assert_eq!(find_git_paths_from(&git_dir, uid), None);
+    }
+
+    #[cfg(unix)]
+    #[test]
+    fn test_find_git_paths_from_defers_git_file() {
+        // Worktrees and submodules use a .git file that git must interpret
+        let temp_dir = TempDir::new().unwrap();
+        let root = temp_dir.path().canonicalize().unwrap();
+        fs::write(root.join(".git"), "gitdir: /elsewhere/.git/worktrees/x\n").unwrap();
+
+        assert_eq!(find_git_paths_from(&root, 0), None);
+    }
+
+    #[cfg(unix)]
+    #[test]
+    fn test_find_git_paths_from_defers_other_owner() {
+        // A repository owned by someone else is subject to git's
+        // safe.directory check, which only git can apply
+        let temp_dir = TempDir::new().unwrap();
+        let (root, uid) = plain_repo(&temp_dir, "");
+
+        assert_eq!(find_git_paths_from(&root, uid.wrapping_add(1)), None);
+    }
+
+    #[cfg(unix)]
+    #[test]
+    fn test_find_git_paths_from_defers_core_worktree() {
+        let temp_dir = TempDir::new().unwrap();
+        let (root, uid) = plain_repo(&temp_dir, "[core]\n\tworktree = /elsewhere\n");
+
+        assert_eq!(find_git_paths_from(&root, uid), None);
+    }
+
+    #[test]
+    fn test_config_overrides_discovery() {
+        let cases = [
+            ("", false),
+            ("[core]\n\tbare = false\n\tfilemode = true\n", false),
+            ("[core]\n\tbare = False ; comment\n", false),
+            ("[user]\n\tworktree = /elsewhere\n", false),
+            ("[core]\n\tworktree = /elsewhere\n", true),
+            ("[Core]\n\tWorkTree=../wt\n", true),
+            ("[core] worktree = /elsewhere\n", true),
+            ("[core]\n\tbare = true\n", true),
+            ("[core]\n\tbare\n", true),
+            ("[extensions]\n\tworktreeConfig = true\n", true),
+            ("[include]\n\tpath = other.config\n", true),
+            ("[includeIf \"gitdir:/x/\"]\n\tpath = other.config\n", true),
+        ];
+
+        for (config, expected) in cases {
+            assert_eq!(config_overrides_discovery(config), expected, "{config:?}");
+        }
+    }
+
     #[test]
     fn test_get_global_gitignore_path() {
         // This test might fail if no global gitignore is configured
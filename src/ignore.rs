@@ -3,16 +3,49 @@
 use crate::{PatternIssue, PatternSeverity, PatternValidationLevel};
 use anyhow::{bail, Context};
 use std::{
+    borrow::Cow,
     collections::HashSet,
     fs::{File, OpenOptions},
-    io::{BufRead, BufReader, BufWriter, Write},
+    io::{ErrorKind, Read, Seek, SeekFrom, Write},
     path::Path,
 };
 
+/// Patterns so broad they are likely to ignore more than intended
+const BROAD_PATTERNS: &[&str] = &["*", "**", "/"];
+
+/// Patterns that would ignore files every project is expected to track
+const IMPORTANT_FILE_PATTERNS: &[&str] = &[".git", ".gitignore", "README*", "LICENSE*"];
+
+/// Characters at least one of which every non-newline validation rule needs
+/// to match, so patterns without any of them can skip the rule checks
+const RULE_TRIGGER_CHARS: [char; 3] = ['*', '/', '.'];
+
+/// Most threads `read_ignore_patterns_many` reads files on
+const MAX_READ_THREADS: usize = 8;
+
+/// Default content for a new `.git/info/exclude`, matching git's own template
+const EXCLUDE_FILE_TEMPLATE: &str = r#"# git ls-files --others --exclude-from=.git/info/exclude
+# Lines that start with '#' are comments.
+# For a project mostly in C, the following would be a good set of
+# exclude patterns (uncomment them if you want to use them):
+# *.[oa]
+# *~
+"#;
+
 /// Sanitize a pattern to prevent file corruption
-fn sanitize_pattern(pattern: &str) -> String {
-    // Remove newlines and carriage returns that could break file format
-    pattern.replace(['\n', '\r'], "").trim().to_string()
+///
+/// Borrows from the input unless a newline has to be removed, so callers that
+/// only inspect the result (such as validation) don't allocate.
+fn sanitize_pattern(pattern: &str) -> Cow<'_, str> {
+    // Remove newlines and carriage returns that could break file format.
+    // Both are whitespace, so trimming first gives the same result, with the
+    // removal pass only when one is present inside the pattern.
+    let trimmed = pattern.trim();
+    if trimmed.contains(['\n', '\r']) {
+        Cow::Owned(trimmed.replace(['\n', '\r'], ""))
+    } else {
+        Cow::Borrowed(trimmed)
+    }
 }
 
 /// Normalize a pattern for duplicate comparison.
@@ -31,6 +64,25 @@ fn normalize_pattern_for_dedup(pattern: &str) -> &str {
 
 /// Validate that file path is safe to write to
 fn validate_file_path(file_path: &Path, base_dir: Option<&Path>) -> anyhow::Result<()> {
+    let Some(base) = base_dir else {
+        // Without a base directory there is nothing to compare a resolved path
+        // against, so only check that the parent directory exists instead of
+        // resolving every path component. That holds whenever the file itself
+        // exists, so a single stat covers both cases. A bare file name has an
+        // empty parent, meaning the current directory.
+        let parent = match file_path.parent() {
+            Some(parent) if !parent.as_os_str().is_empty() => parent,
+            _ => Path::new("."),
+        };
+        if parent.is_dir() {
+            return Ok(());
+        }
+        bail!(
+            "Invalid file path: {} (parent directory does not exist)",
+            file_path.display()
+        );
+    };
+
     let resolved = if file_path.exists() {
         file_path.canonicalize()
     } else if let Some(parent) = file_path.parent() {
@@ -50,17 +102,15 @@ fn validate_file_path(file_path: &Path, base_dir: Option<&Path>) -> anyhow::Resu
     }
     .with_context(|| format!("Invalid file path: {}", file_path.display()))?;
 
-    if let Some(base) = base_dir {
-        let base_resolved = base
-            .canonicalize()
-            .with_context(|| format!("Invalid base directory: {}", base.display()))?;
+    let base_resolved = base
+        .canonicalize()
+        .with_context(|| format!("Invalid base directory: {}", base.display()))?;
 
-        if !resolved.starts_with(base_resolved) {
-            bail!(
-                "File path {} is outside allowed directory",
-                file_path.display()
-            );
-        }
+    if !resolved.starts_with(base_resolved) {
+        bail!(
+            "File path {} is outside allowed directory",
+            file_path.display()
+        );
     }
 
     Ok(())
@@ -68,29 +118,77 @@ fn validate_file_path(file_path: &Path, base_dir: Option<&Path>) -> anyhow::Resu
 
 /// Read patterns from ignore file
 pub fn read_ignore_patterns(file_path: &Path) -> anyhow::Result<HashSet<String>> {
-    if !file_path.exists() {
-        return Ok(HashSet::new());
-    }
-
-    let file = File::open(file_path)
-        .with_context(|| format!("Failed to open ignore file: {}", file_path.display()))?;
+    // Ignore files are small, read the whole file in one go. A missing file
+    // is reported by the read itself, so no separate existence check is made.
+    let content = match std::fs::read(file_path) {
+        Ok(bytes) => decode_content(bytes),
+        Err(e) if e.kind() == ErrorKind::NotFound => return Ok(HashSet::new()),
+        Err(e) => {
+            return Err(e)
+                .with_context(|| format!("Failed to read ignore file: {}", file_path.display()))
+        }
+    };
 
-    let reader = BufReader::new(file);
-    let mut patterns = HashSet::new();
+    Ok(parse_patterns(&content).map(str::to_string).collect())
+}
 
-    for line in reader.lines() {
-        let line =
-            line.with_context(|| format!("Failed to read line from: {}", file_path.display()))?;
+/// Decode ignore file content, replacing invalid UTF-8 instead of failing
+///
+/// Git treats ignore files as bytes, so a stray non-UTF-8 line (for example
+/// a Latin-1 file name) shouldn't make the whole file unreadable. Valid
+/// content, the usual case, is taken over without copying.
+fn decode_content(bytes: Vec<u8>) -> String {
+    String::from_utf8(bytes).unwrap_or_else(|e| String::from_utf8_lossy(e.as_bytes()).into_owned())
+}
 
-        let trimmed = line.trim();
+/// Read patterns from several ignore files at once
+///
+/// The files are spread over up to `MAX_READ_THREADS` threads, so the total
+/// wait is roughly that of the slowest share rather than the sum of all the
+/// reads, which matters on network filesystems. Results are returned in the
+/// same order as `file_paths`; if any read fails, the first failing path's
+/// error is returned.
+pub fn read_ignore_patterns_many<P>(file_paths: &[P]) -> anyhow::Result<Vec<HashSet<String>>>
+where
+    P: AsRef<Path> + Sync,
+{
+    let read_all = |paths: &[P]| -> Vec<anyhow::Result<HashSet<String>>> {
+        paths
+            .iter()
+            .map(|path| read_ignore_patterns(path.as_ref()))
+            .collect()
+    };
 
-        // Skip empty lines and comments
-        if !trimmed.is_empty() && !trimmed.starts_with('#') {
-            patterns.insert(trimmed.to_string());
-        }
+    if file_paths.len() <= 1 {
+        return read_all(file_paths).into_iter().collect();
     }
 
-    Ok(patterns)
+    // Contiguous chunks keep each thread's results in input order
+    let chunk_size = file_paths.len().div_ceil(MAX_READ_THREADS);
+    std::thread::scope(|scope| {
+        let handles: Vec<_> = file_paths
+            .chunks(chunk_size)
+            .map(|chunk| scope.spawn(move || read_all(chunk)))
+            .collect();
+
+        handles
+            .into_iter()
+            .flat_map(|handle| {
+                handle
+                    .join()
+                    .unwrap_or_else(|panic| std::panic::resume_unwind(panic))
+            })
+            .collect()
+    })
+}
+
+/// Iterate over the patterns in ignore file content, skipping blank lines and
+/// comments
+fn parse_patterns(content: &str) -> impl Iterator<Item = &str> {
+    content
+        .lines()
+        .map(str::trim)
+        .filter(|line| !line.is_empty() && !line.starts_with('#'))
 }
 
 /// Write patterns to ignore file
@@ -99,29 +197,32 @@ pub fn write_ignore_patterns(
     patterns: &[String],
     append: bool,
 ) -> anyhow::Result<()> {
-    if patterns.is_empty() {
-        return Ok(());
-    }
-
-    validate_file_path(file_path, None)?;
-
     // Sanitize all patterns before writing
     let sanitized_patterns: Vec<String> = patterns
         .iter()
         .map(|p| sanitize_pattern(p))
         .filter(|p| !p.is_empty())
+        .map(Cow::into_owned)
         .collect();
 
+    write_sanitized_patterns(file_path, &sanitized_patterns, append)
+}
+
+/// Write patterns that have already been through `sanitize_pattern` and are
+/// non-empty
+fn write_sanitized_patterns(
+    file_path: &Path,
+    sanitized_patterns: &[String],
+    append: bool,
+) -> anyhow::Result<()> {
     if sanitized_patterns.is_empty() {
         return Ok(());
     }
 
-    // Ensure parent directory exists
-    if let Some(parent) = file_path.parent() {
-        std::fs::create_dir_all(parent)
-            .with_context(|| format!("Failed to create directory: {}", parent.display()))?;
-    }
+    validate_file_path(file_path, None)?;
 
+    // validate_file_path() has already established that the parent directory
+    // exists, so the file can be opened straight away.
     let mut file = if append {
         OpenOptions::new()
             .create(true)
@@ -137,25 +238,77 @@ pub fn write_ignore_patterns(
     }
     .with_context(|| format!("Failed to write to: {}", file_path.display()))?;
 
-    // Handle newline for append mode
-    if append && file.metadata().map(|m| m.len()).unwrap_or(0) > 0 {
-        writeln!(file)
-            .with_context(|| format!("Failed to write newline to: {}", file_path.display()))?;
+    // Handle newline for append mode: only separate from existing content
+    // that doesn't already end its last line
+    let separate = append
+        && missing_final_newline(&mut file)
+            .with_context(|| format!("Failed to read ignore file: {}", file_path.display()))?;
+
+    write_patterns_to(&mut file, file_path, sanitized_patterns, separate)
+}
+
+/// Write sanitized patterns to an open file, one per line
+fn write_patterns_to(
+    file: &mut File,
+    file_path: &Path,
+    sanitized_patterns: &[String],
+    separate: bool,
+) -> anyhow::Result<()> {
+    // Build the whole update up front so it lands in the file with a single
+    // write; with O_APPEND that write is also positioned atomically. The
+    // exact size is known, so the buffer is allocated once.
+    let size = usize::from(separate)
+        + sanitized_patterns
+            .iter()
+            .map(|pattern| pattern.len() + 1)
+            .sum::<usize>();
+    let mut payload = String::with_capacity(size);
+    if separate {
+        payload.push('\n');
     }
 
-    let mut writer = BufWriter::new(&mut file);
     for pattern in sanitized_patterns {
-        writeln!(writer, "{pattern}")
-            .with_context(|| format!("Failed to write pattern to: {}", file_path.display()))?;
+        payload.push_str(pattern);
+        payload.push('\n');
     }
 
-    writer
-        .flush()
-        .with_context(|| format!("Failed to flush writes to: {}", file_path.display()))?;
+    file.write_all(payload.as_bytes())
+        .with_context(|| format!("Failed to write patterns to: {}", file_path.display()))?;
 
     Ok(())
 }
 
+/// Open an existing ignore file for appending and read its current content
+/// through the same handle
+///
+/// Returns `None` if that isn't possible (missing, read-only, ...),
+/// leaving the caller to take the separate read and write path, which
+/// creates missing files and reports errors with their usual context.
+fn open_for_update(file_path: &Path) -> Option<(File, String)> {
+    let mut file = OpenOptions::new()
+        .read(true)
+        .append(true)
+        .open(file_path)
+        .ok()?;
+    let mut bytes = Vec::new();
+    file.read_to_end(&mut bytes).ok()?;
+    Some((file, decode_content(bytes)))
+}
+
+/// Check whether a non-empty file's last byte is something other than a newline
+///
+/// Only the final byte is read, whatever the size of the file.
+fn missing_final_newline(file: &mut File) -> std::io::Result<bool> {
+    if file.seek(SeekFrom::End(0))? == 0 {
+        return Ok(false);
+    }
+
+    let mut last = [0u8; 1];
+    file.seek(SeekFrom::End(-1))?;
+    file.read_exact(&mut last)?;
+    Ok(last[0] != b'\n')
+}
+
 /// Add patterns to an ignore file, optionally avoiding duplicates
 pub fn add_patterns_to_ignore_file(
     file_path: &Path,
@@ -170,32 +323,60 @@ pub fn add_patterns_to_ignore_file(
     // Skip validation - patterns should be pre-validated by caller
     // The validation_level parameter is kept for API compatibility
 
-    let mut seen: HashSet<String> = if avoid_duplicates {
-        read_ignore_patterns(file_path)?
-            .into_iter()
-            .map(|p| normalize_pattern_for_dedup(&p).to_string())
-            .collect()
+    // Check for duplicates against the content read through the handle the
+    // new patterns are then appended to, so the file is only opened once
+    let existing = if avoid_duplicates {
+        open_for_update(file_path)
     } else {
-        HashSet::new()
+        None
     };
 
-    let mut patterns_to_add = Vec::new();
+    // Set entries borrow from the file content and the caller's patterns, so
+    // only patterns that needed a newline stripped allocate a key
+    let mut seen: HashSet<Cow<'_, str>> = match &existing {
+        Some((_, content)) => parse_patterns(content)
+            .map(|p| Cow::Borrowed(normalize_pattern_for_dedup(p)))
+            .collect(),
+        // Normalize in place, reusing each pattern's allocation
+        None if avoid_duplicates => read_ignore_patterns(file_path)?
+            .into_iter()
+            .map(|mut p| {
+                p.truncate(normalize_pattern_for_dedup(&p).len());
+                Cow::Owned(p)
+            })
+            .collect(),
+        None => HashSet::new(),
+    };
+
+    let mut patterns_to_add = Vec::with_capacity(new_patterns.len());
     for pattern in new_patterns {
         let sanitized = sanitize_pattern(pattern);
         if sanitized.is_empty() {
             continue;
         }
         if avoid_duplicates {
-            let normalized = normalize_pattern_for_dedup(&sanitized).to_string();
+            let normalized = match &sanitized {
+                Cow::Borrowed(p) => Cow::Borrowed(normalize_pattern_for_dedup(p)),
+                Cow::Owned(p) => Cow::Owned(normalize_pattern_for_dedup(p).to_string()),
+            };
+            // A single lookup both checks for and records the pattern
             if !seen.insert(normalized) {
                 continue;
             }
         }
-        patterns_to_add.push(sanitized);
+        patterns_to_add.push(sanitized.into_owned());
     }
 
-    if !patterns_to_add.is_empty() {
-        write_ignore_patterns(file_path, &patterns_to_add, true)?;
+    // Patterns were sanitized above, don't do it again on the way out
+    match existing {
+        Some((mut file, content)) if !patterns_to_add.is_empty() => {
+            // The content already in hand tells whether the last line is
+            // terminated, no need to read the file's final byte again
+            let separate = !content.is_empty() && !content.ends_with('\n');
+            write_patterns_to(&mut file, file_path, &patterns_to_add, separate)?;
+        }
+        Some(_) => {}
+        None => write_sanitized_patterns(file_path, &patterns_to_add, true)?,
     }
 
     Ok(patterns_to_add)
@@ -206,7 +387,8 @@ pub fn validate_ignore_patterns(patterns: &[String]) -> Vec<PatternIssue> {
     let mut issues = Vec::new();
 
     for original_pattern in patterns {
-        let pattern = sanitize_pattern(original_pattern);
+        let sanitized = sanitize_pattern(original_pattern);
+        let pattern: &str = &sanitized;
 
         // Skip empty patterns after sanitization
         if pattern.is_empty() {
@@ -223,27 +405,33 @@ pub fn validate_ignore_patterns(patterns: &[String]) -> Vec<PatternIssue> {
             });
         }
 
-        // Check for common issues
-        if pattern.starts_with('/') && pattern.ends_with('/') && pattern.len() > 2 {
-            issues.push(PatternIssue {
-                pattern: pattern.clone(),
+        // Most patterns are plain names like "build" or "target" that no
+        // remaining rule can flag
+        if !pattern.contains(RULE_TRIGGER_CHARS) {
+            continue;
+        }
+
+        // Check for common issues. A pattern can't start with both '/' and
+        // '.', so one match on its bytes covers both prefix checks.
+        match pattern.as_bytes() {
+            [b'/', _, .., b'/'] => issues.push(PatternIssue {
+                pattern: pattern.to_string(),
                 severity: PatternSeverity::Info,
                 message: "Pattern has leading and trailing slashes - might be too restrictive"
                     .to_string(),
-            });
-        }
-
-        if pattern.starts_with("./") {
-            issues.push(PatternIssue {
-                pattern: pattern.clone(),
+            }),
+            [b'.', b'/', ..] => issues.push(PatternIssue {
+                pattern: pattern.to_string(),
                 severity: PatternSeverity::Info,
                 message: "Pattern starts with './' which is redundant".to_string(),
-            });
+            }),
+            _ => {}
         }
 
-        if pattern.matches("**").count() > 1 {
+        // Stop at the second occurrence rather than counting them all
+        if pattern.matches("**").nth(1).is_some() {
             issues.push(PatternIssue {
-                pattern: pattern.clone(),
+                pattern: pattern.to_string(),
                 severity: PatternSeverity::Warning,
                 message: "Pattern contains multiple '**' which may not work as expected"
                     .to_string(),
@@ -251,21 +439,18 @@ pub fn validate_ignore_patterns(patterns: &[String]) -> Vec<PatternIssue> {
         }
 
         // Check for very broad patterns
-        if matches!(pattern.as_str(), "*" | "**" | "/") {
+        if BROAD_PATTERNS.contains(&pattern) {
             issues.push(PatternIssue {
-                pattern: pattern.clone(),
+                pattern: pattern.to_string(),
                 severity: PatternSeverity::Warning,
                 message: "Pattern is very broad and may ignore more than intended".to_string(),
             });
         }
 
         // Check for patterns that might ignore important files
-        if matches!(
-            pattern.as_str(),
-            ".git" | ".gitignore" | "README*" | "LICENSE*"
-        ) {
+        if IMPORTANT_FILE_PATTERNS.contains(&pattern) {
             issues.push(PatternIssue {
-                pattern: pattern.clone(),
+                pattern: pattern.to_string(),
                 severity: PatternSeverity::Warning,
                 message: "Pattern might ignore important project files".to_string(),
             });
@@ -277,35 +462,51 @@ pub fn validate_ignore_patterns(patterns: &[String]) -> Vec<PatternIssue> {
 
 /// Ensure the .git/info/exclude file exists and has proper structure
 pub fn ensure_info_exclude_exists(exclude_file_path: &Path) -> anyhow::Result<()> {
-    if exclude_file_path.exists() {
-        return Ok(());
-    }
-
-    // Create the info directory if it doesn't exist
-    if let Some(parent) = exclude_file_path.parent() {
-        std::fs::create_dir_all(parent)
-            .with_context(|| format!("Failed to create directory: {}", parent.display()))?;
-    }
-
-    // Create the exclude file with default template
-    let template = r#"# git ls-files --others --exclude-from=.git/info/exclude
-# Lines that start with '#' are comments.
-# For a project mostly in C, the following would be a good set of
-# exclude patterns (uncomment them if you want to use them):
-# *.[oa]
-# *~
-"#;
-
-    std::fs::write(exclude_file_path, template).with_context(|| {
+    let init_context = || {
         format!(
             "Failed to initialize exclude file: {}",
             exclude_file_path.display()
         )
-    })?;
+    };
+
+    // Creating the file exclusively doubles as the existence check, so an
+    // existing file costs a single failed open and never touches the directory
+    let created = match create_new_file(exclude_file_path) {
+        Err(e) if e.kind() == ErrorKind::NotFound => {
+            // Create the info directory if it doesn't exist
+            if let Some(parent) = exclude_file_path.parent() {
+                std::fs::create_dir_all(parent)
+                    .with_context(|| format!("Failed to create directory: {}", parent.display()))?;
+            }
+            // Another process may have created the file in the meantime
+            create_new_file(exclude_file_path)
+        }
+        result => result,
+    };
+    let Some(mut file) = created.with_context(init_context)? else {
+        return Ok(());
+    };
+
+    // Write the default template into the newly created file
+    file.write_all(EXCLUDE_FILE_TEMPLATE.as_bytes())
+        .with_context(init_context)?;
 
     Ok(())
 }
 
+/// Create a file, returning `None` if it already exists
+fn create_new_file(file_path: &Path) -> std::io::Result<Option<File>> {
+    match OpenOptions::new()
+        .write(true)
+        .create_new(true)
+        .open(file_path)
+    {
+        Ok(file) => Ok(Some(file)),
+        Err(e) if e.kind() == ErrorKind::AlreadyExists => Ok(None),
+        Err(e) => Err(e),
+    }
+}
+
 #[cfg(test)]
 mod tests {
     use super::*;
@@ -318,6 +519,8 @@ mod tests {
         assert_eq!(sanitize_pattern("  *.pyc  "), "*.pyc");
         assert_eq!(sanitize_pattern("*.pyc\n"), "*.pyc");
         assert_eq!(sanitize_pattern("*.pyc\r\n"), "*.pyc");
+        assert_eq!(sanitize_pattern("*.pyc\nbuild"), "*.pycbuild");
+        assert_eq!(sanitize_pattern(" \n *.pyc \r "), "*.pyc");
         assert_eq!(sanitize_pattern(""), "");
     }
 
@@ -354,6 +557,114 @@ mod tests {
         assert_eq!(issues[0].severity, PatternSeverity::Error);
     }
 
+    #[test]
+    fn test_validate_ignore_patterns_multiple_globstar() {
+        let issues = validate_ignore_patterns(&["**/build/**".to_string()]);
+        assert_eq!(issues.len(), 1);
+        assert_eq!(issues[0].severity, PatternSeverity::Warning);
+
+        // A lone globstar, even with extra stars around it, is fine
+        assert!(validate_ignore_patterns(&["**/build".to_string()]).is_empty());
+        assert!(validate_ignore_patterns(&["a/***".to_string()]).is_empty());
+    }
+
+    #[test]
+    fn test_validate_ignore_patterns_slashes() {
+        for pattern in ["/build/", "./build"] {
+            let issues = validate_ignore_patterns(&[pattern.to_string()]);
+            assert_eq!(issues.len(), 1, "{pattern}");
+            assert_eq!(issues[0].severity, PatternSeverity::Info);
+        }
+
+        // Too short to have anything between the slashes
+        assert!(validate_ignore_patterns(&["//".to_string()]).is_empty());
+    }
+
+    #[test]
+    fn test_rule_tables_need_trigger_chars() {
+        // The plain-name fast path in validate_ignore_patterns relies on this
+        for pattern in BROAD_PATTERNS.iter().chain(IMPORTANT_FILE_PATTERNS) {
+            assert!(pattern.contains(RULE_TRIGGER_CHARS), "{pattern}");
+        }
+
+        let issues = validate_ignore_patterns(&["build".to_string(), "target".to_string()]);
+        assert!(issues.is_empty());
+    }
+
+    #[test]
+    fn test_validate_file_path() {
+        let temp_dir = TempDir::new().unwrap();
+        let inside = temp_dir.path().join("new_file");
+        assert!(validate_file_path(&inside, None).is_ok());
+        assert!(validate_file_path(&inside, Some(temp_dir.path())).is_ok());
+
+        let missing_parent = temp_dir.path().join("missing").join("file");
+        assert!(validate_file_path(&missing_parent, None).is_err());
+
+        // A bare file name lives in the current directory
+        assert!(validate_file_path(Path::new("new_file"), None).is_ok());
+
+        let other_dir = TempDir::new().unwrap();
+        assert!(validate_file_path(&inside, Some(other_dir.path())).is_err());
+    }
+
+    #[test]
+    fn test_read_ignore_patterns_invalid_utf8() {
+        let temp_dir = TempDir::new().unwrap();
+        let temp_file = temp_dir.path().join("test_ignore");
+        std::fs::write(&temp_file, b"*.pyc\ncaf\xe9/\nbuild/\n").unwrap();
+
+        // The invalid byte is replaced, the rest of the file still reads
+        let patterns = read_ignore_patterns(&temp_file).unwrap();
+        assert_eq!(patterns.len(), 3);
+        assert!(patterns.contains("*.pyc"));
+        assert!(patterns.contains("caf\u{FFFD}/"));
+        assert!(patterns.contains("build/"));
+    }
+
+    #[test]
+    fn test_read_ignore_patterns_many() {
+        let temp_dir = TempDir::new().unwrap();
+        let first = temp_dir.path().join("first");
+        let second = temp_dir.path().join("second");
+        let missing = temp_dir.path().join("missing");
+        std::fs::write(&first, "*.pyc\n").unwrap();
+        std::fs::write(&second, "# comment\nbuild/\ndist/\n").unwrap();
+
+        let results = read_ignore_patterns_many(&[&first, &second, &missing]).unwrap();
+        assert_eq!(results.len(), 3);
+        assert_eq!(results[0], HashSet::from(["*.pyc".to_string()]));
+        assert_eq!(
+            results[1],
+            HashSet::from(["build/".to_string(), "dist/".to_string()])
+        );
+        assert!(results[2].is_empty());
+
+        // A failure on any file is reported
+        let unreadable = temp_dir.path().to_path_buf();
+        assert!(read_ignore_patterns_many(&[&first, &unreadable]).is_err());
+    }
+
+    #[test]
+    fn test_read_ignore_patterns_many_more_files_than_threads() {
+        let temp_dir = TempDir::new().unwrap();
+        let count = MAX_READ_THREADS * 2 + 3;
+        let paths: Vec<_> = (0..count)
+            .map(|i| {
+                let path = temp_dir.path().join(format!("ignore{i}"));
+                std::fs::write(&path, format!("pattern{i}\n")).unwrap();
+                path
+            })
+            .collect();
+
+        // Every file is read, and results stay in input order
+        let results = read_ignore_patterns_many(&paths).unwrap();
+        assert_eq!(results.len(), count);
+        for (i, patterns) in results.iter().enumerate() {
+            assert_eq!(*patterns, HashSet::from([format!("pattern{i}")]));
+        }
+    }
+
     #[test]
     fn test_write_ignore_patterns() {
         let temp_dir = TempDir::new().unwrap();
@@ -363,8 +674,34 @@ mod tests {
         write_ignore_patterns(&temp_file, &patterns, false).unwrap();
 
         let content = std::fs::read_to_string(&temp_file).unwrap();
-        assert!(content.contains("*.pyc\n"));
-        assert!(content.contains("__pycache__/\n"));
+        assert_eq!(content, "*.pyc\n__pycache__/\n");
+    }
+
+    #[test]
+    fn test_write_ignore_patterns_append() {
+        let temp_dir = TempDir::new().unwrap();
+        let temp_file = temp_dir.path().join("test_ignore");
+        std::fs::write(&temp_file, "*.pyc").unwrap();
+
+        let patterns = vec!["build/".to_string(), "dist/".to_string()];
+        write_ignore_patterns(&temp_file, &patterns, true).unwrap();
+
+        let content = std::fs::read_to_string(&temp_file).unwrap();
+        assert_eq!(content, "*.pyc\nbuild/\ndist/\n");
+    }
+
+    #[test]
+    fn test_write_ignore_patterns_append_after_trailing_newline() {
+        let temp_dir = TempDir::new().unwrap();
+        let temp_file = temp_dir.path().join("test_ignore");
+        std::fs::write(&temp_file, "*.pyc\n").unwrap();
+
+        let patterns = vec!["build/".to_string()];
+        write_ignore_patterns(&temp_file, &patterns, true).unwrap();
+
+        // No blank line is inserted when the file already ends with a newline
+        let content = std::fs::read_to_string(&temp_file).unwrap();
+        assert_eq!(content, "*.pyc\nbuild/\n");
     }
 
     #[test]
@@ -401,7 +738,7 @@ mod tests {
         assert!(added.is_empty());
 
         let content = std::fs::read_to_string(&temp_file).unwrap();
-        assert_eq!(content.matches("planning").count(), 1);
+        assert_eq!(content, "planning\n");
     }
 
     #[test]
@@ -418,4 +755,60 @@ mod tests {
         .unwrap();
         assert_eq!(added, vec!["planning".to_string()]);
     }
+
+    #[test]
+    fn test_ensure_info_exclude_exists() {
+        let temp_dir = TempDir::new().unwrap();
+        let exclude_file = temp_dir.path().join("info").join("exclude");
+
+        // Missing directory and file are both created
+        ensure_info_exclude_exists(&exclude_file).unwrap();
+        let content = std::fs::read_to_string(&exclude_file).unwrap();
+        assert_eq!(content, EXCLUDE_FILE_TEMPLATE);
+
+        // An existing file is left alone
+        std::fs::write(&exclude_file, "*.local\n").unwrap();
+        ensure_info_exclude_exists(&exclude_file).unwrap();
+        let content = std::fs::read_to_string(&exclude_file).unwrap();
+        assert_eq!(content, "*.local\n");
+    }
+
+    #[test]
+    fn test_create_new_file_existing() {
+        let temp_dir = TempDir::new().unwrap();
+        let exclude_file = temp_dir.path().join("exclude");
+
+        assert!(create_new_file(&exclude_file).unwrap().is_some());
+
+        // A file created in between, e.g. by a concurrent run after the
+        // directory was made, is reported as existing rather than as an error
+        std::fs::write(&exclude_file, "*.local\n").unwrap();
+        assert!(create_new_file(&exclude_file).unwrap().is_none());
+        let content = std::fs::read_to_string(&exclude_file).unwrap();
+        assert_eq!(content, "*.local\n");
+
+        // Other failures still surface
+        let missing = temp_dir.path().join("missing").join("exclude");
+        let err = create_new_file(&missing).unwrap_err();
+        assert_eq!(err.kind(), ErrorKind::NotFound);
+    }
+
+    #[test]
+    fn test_add_patterns_to_existing_file() {
+        let temp_dir = TempDir::new().unwrap();
+        let temp_file = temp_dir.path().join("test_ignore");
+        std::fs::write(&temp_file, "# comment\n*.pyc").unwrap();
+
+        let added = add_patterns_to_ignore_file(
+            &temp_file,
+            &["*.pyc".to_string(), "build/".to_string()],
+            true,
+            PatternValidationLevel::Warn,
+        )
+        .unwrap();
+        assert_eq!(added, vec!["build/".to_string()]);
+
+        let content = std::fs::read_to_string(&temp_file).unwrap();
+        assert_eq!(content, "# comment\n*.pyc\nbuild/\n");
+    }
 }
@@ -30,23 +30,21 @@ fn validate_patterns_for_library(
     }
 
     let issues = ignore::validate_ignore_patterns(patterns);
-    let has_errors = issues.iter().any(|i| i.severity == PatternSeverity::Error);
-    let has_warnings = issues
-        .iter()
-        .any(|i| i.severity == PatternSeverity::Warning);
+    let strict = validation_level == PatternValidationLevel::Strict;
 
-    if has_errors || (validation_level == PatternValidationLevel::Strict && has_warnings) {
-        // For library usage, we collect all issues into the error message
-        let error_messages: Vec<String> = issues
-            .iter()
-            .filter(|issue| {
-                issue.severity == PatternSeverity::Error
-                    || (validation_level == PatternValidationLevel::Strict
-                        && issue.severity == PatternSeverity::Warning)
-            })
-            .map(|issue| format!("{}: {}", issue.pattern, issue.message))
-            .collect();
+    // For library usage, we collect all blocking issues into the error
+    // message, finding them in the same pass
+    let error_messages: Vec<String> = issues
+        .iter()
+        .filter(|issue| match issue.severity {
+            PatternSeverity::Error => true,
+            PatternSeverity::Warning => strict,
+            PatternSeverity::Info => false,
+        })
+        .map(|issue| format!("{}: {}", issue.pattern, issue.message))
+        .collect();
 
+    if !error_messages.is_empty() {
         bail!("Pattern validation failed: {}", error_messages.join("; "));
     }
 
@@ -54,7 +52,7 @@ fn validate_patterns_for_library(
 }
 
 /// Pattern validation severity levels
-#[derive(Debug, Clone, PartialEq, Eq)]
+#[derive(Debug, Clone, Copy, PartialEq, Eq, Hash)]
 pub enum PatternSeverity {
     /// Informational message
     Info,
@@ -73,7 +71,7 @@ pub struct PatternIssue {
 }
 
 /// Pattern validation level
-#[derive(Debug, Clone, PartialEq, Eq)]
+#[derive(Debug, Clone, Copy, PartialEq, Eq, Hash)]
 pub enum PatternValidationLevel {
     /// Skip all validation
     None,
@@ -4,6 +4,7 @@ use clap::{Arg, ArgAction, Command};
 use git_ignore_tool::{git, ignore, PatternIssue, PatternSeverity, PatternValidationLevel};
 use std::{
     env,
+    fmt::Write as _,
     io::{self, Write},
     process,
 };
@@ -64,55 +65,57 @@ fn create_parser() -> Command {
         )
 }
 
-/// Display validation issues to stderr
-fn display_validation_issues(issues: &[PatternIssue]) {
+/// Append a report section: a header line followed by one line per issue
+fn push_issue_section(report: &mut String, header: &str, issues: &[&PatternIssue]) {
+    report.push_str(header);
+    report.push('\n');
+    for issue in issues {
+        writeln!(report, "  {}: {}", issue.pattern, issue.message).unwrap();
+    }
+}
+
+/// Display validation issues on `out`, which is stderr for the CLI
+///
+/// Returns whether any of the issues should block execution.
+fn display_validation_issues(issues: &[PatternIssue], out: &mut impl Write) -> bool {
     if issues.is_empty() {
-        return;
+        return false;
     }
 
-    let mut stderr = io::stderr();
-    let errors: Vec<_> = issues
-        .iter()
-        .filter(|i| i.severity == PatternSeverity::Error)
-        .collect();
-    let warnings: Vec<_> = issues
-        .iter()
-        .filter(|i| i.severity == PatternSeverity::Warning)
-        .collect();
-    let infos: Vec<_> = issues
-        .iter()
-        .filter(|i| i.severity == PatternSeverity::Info)
-        .collect();
+    let mut errors = Vec::new();
+    let mut warnings = Vec::new();
+    let mut infos = Vec::new();
+    for issue in issues {
+        match issue.severity {
+            PatternSeverity::Error => errors.push(issue),
+            PatternSeverity::Warning => warnings.push(issue),
+            PatternSeverity::Info => infos.push(issue),
+        }
+    }
+
+    // Build the whole report so it reaches the output in a single write
+    let mut report = String::new();
 
     if !errors.is_empty() {
-        writeln!(stderr, "ERROR: Found problematic patterns:").unwrap();
-        for issue in &errors {
-            writeln!(stderr, "  {}: {}", issue.pattern, issue.message).unwrap();
-        }
+        push_issue_section(&mut report, "ERROR: Found problematic patterns:", &errors);
     }
 
     if !warnings.is_empty() {
-        if errors.is_empty() {
-            writeln!(stderr, "WARNING: Potentially problematic patterns found:").unwrap();
+        let header = if errors.is_empty() {
+            "WARNING: Potentially problematic patterns found:"
         } else {
-            writeln!(stderr, "WARNING: Additional issues:").unwrap();
-        }
-        for issue in &warnings {
-            writeln!(stderr, "  {}: {}", issue.pattern, issue.message).unwrap();
-        }
+            "WARNING: Additional issues:"
+        };
+        push_issue_section(&mut report, header, &warnings);
     }
 
     if !infos.is_empty() && errors.is_empty() && warnings.is_empty() {
-        writeln!(stderr, "INFO: Pattern suggestions:").unwrap();
-        for issue in infos {
-            writeln!(stderr, "  {}: {}", issue.pattern, issue.message).unwrap();
-        }
+        push_issue_section(&mut report, "INFO: Pattern suggestions:", &infos);
     }
-}
 
-/// Check if validation issues should block execution
-fn has_blocking_issues(issues: &[PatternIssue]) -> bool {
-    issues.iter().any(|i| i.severity == PatternSeverity::Error)
+    out.write_all(report.as_bytes()).unwrap();
+
+    !errors.is_empty()
 }
 
 /// Get target file path based on arguments
@@ -169,11 +172,8 @@ fn run() -> anyhow::Result<()> {
         Vec::new()
     };
 
-    // Display validation issues
-    display_validation_issues(&issues);
-
-    // Check if we should continue
-    if has_blocking_issues(&issues) {
+    // Display validation issues and check if we should continue
+    if display_validation_issues(&issues, &mut io::stderr()) {
         anyhow::bail!("Pattern validation failed with errors");
     }
 
@@ -258,3 +258,154 @@ fn main() {
 
     process::exit(exit_code);
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use clap::error::ErrorKind;
+
+    /// Build a validation issue for the report tests
+    fn issue(pattern: &str, severity: PatternSeverity, message: &str) -> PatternIssue {
+        PatternIssue {
+            pattern: pattern.to_string(),
+            severity,
+            message: message.to_string(),
+        }
+    }
+
+    #[test]
+    fn test_parser_creation() {
+        // Checks the argument definitions once, here, instead of relying on
+        // clap's debug assertions firing in whichever test parses first
+        create_parser().debug_assert();
+    }
+
+    #[test]
+    fn test_version_output() {
+        let err = create_parser()
+            .try_get_matches_from(["git-ignore", "--version"])
+            .unwrap_err();
+        assert_eq!(err.kind(), ErrorKind::DisplayVersion);
+        assert!(err.to_string().contains(VERSION));
+    }
+
+    #[test]
+    fn test_help_output() {
+        let err = create_parser()
+            .try_get_matches_from(["git-ignore", "--help"])
+            .unwrap_err();
+        assert_eq!(err.kind(), ErrorKind::DisplayHelp);
+
+        let help = err.to_string();
+        assert!(help.contains("Add patterns to git ignore files"));
+        assert!(help.contains("Usage: git-ignore"));
+    }
+
+    #[test]
+    fn test_flag_parsing() {
+        // One parser serves every case; matching doesn't consume it
+        let mut parser = create_parser();
+        let cases: &[(&[&str], &str, bool)] = &[
+            (&["--local", "*.pyc"], "local", true),
+            (&["-l", "*.pyc"], "local", true),
+            (&["*.pyc"], "local", false),
+            (&["--global", "*.pyc"], "global", true),
+            (&["-g", "*.pyc"], "global", true),
+            (&["--no-validate", "*.pyc"], "no-validate", true),
+            (&["*.pyc"], "no-validate", false),
+            (&["--allow-duplicates", "*.pyc"], "allow-duplicates", true),
+            (&["*.pyc"], "allow-duplicates", false),
+        ];
+
+        for &(args, flag, expected) in cases {
+            let matches = parser
+                .try_get_matches_from_mut(std::iter::once("git-ignore").chain(args.iter().copied()))
+                .unwrap();
+            assert_eq!(matches.get_flag(flag), expected, "{args:?}");
+        }
+    }
+
+    #[test]
+    fn test_get_target_file_conflicting_flags() {
+        let err = get_target_file(true, true).unwrap_err();
+        assert_eq!(err.to_string(), "Cannot specify both --local and --global");
+    }
+
+    #[test]
+    fn test_get_file_description() {
+        let path = std::path::Path::new("/repo/ignore");
+        let cases = [
+            (false, false, ".gitignore (/repo/ignore)"),
+            (true, false, ".git/info/exclude (/repo/ignore)"),
+            (false, true, "global gitignore (/repo/ignore)"),
+        ];
+
+        for (local, global, expected) in cases {
+            assert_eq!(get_file_description(path, local, global), expected);
+        }
+    }
+
+    #[test]
+    fn test_display_no_issues() {
+        let mut out = Vec::new();
+        assert!(!display_validation_issues(&[], &mut out));
+        assert!(out.is_empty());
+    }
+
+    #[test]
+    fn test_display_error_issues() {
+        let issues = [issue(
+            "bad\npattern",
+            PatternSeverity::Error,
+            "Pattern contains newline characters",
+        )];
+
+        let mut out = Vec::new();
+        assert!(display_validation_issues(&issues, &mut out));
+
+        let output = String::from_utf8(out).unwrap();
+        assert_eq!(
+            output,
+            "ERROR: Found problematic patterns:\n  \
+            bad\npattern: Pattern contains newline characters\n"
+        );
+    }
+
+    #[test]
+    fn test_display_mixed_issues() {
+        let issues = [
+            issue("*", PatternSeverity::Warning, "Broad"),
+            issue("./file", PatternSeverity::Info, "Redundant"),
+            issue("bad", PatternSeverity::Error, "Invalid"),
+        ];
+
+        let mut out = Vec::new();
+        assert!(display_validation_issues(&issues, &mut out));
+
+        // Errors come first, warnings are reported as additional and
+        // suggestions are left out while there are real problems
+        let output = String::from_utf8(out).unwrap();
+        let lines: Vec<&str> = output.lines().collect();
+        assert_eq!(
+            lines,
+            [
+                "ERROR: Found problematic patterns:",
+                "  bad: Invalid",
+                "WARNING: Additional issues:",
+                "  *: Broad",
+            ]
+        );
+
+        // Warnings alone don't block and get their own header
+        let mut out = Vec::new();
+        assert!(!display_validation_issues(&issues[..2], &mut out));
+        let output = String::from_utf8(out).unwrap();
+        assert_eq!(
+            output.lines().collect::<Vec<_>>(),
+            [
+                "WARNING: Potentially problematic patterns found:",
+                "  *: Broad"
+            ]
+        );
+    }
+}
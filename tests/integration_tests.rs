@@ -1,53 +1,58 @@
-use assert_cmd::prelude::*;
 use predicates::prelude::*;
+use std::collections::HashMap;
 use std::fs;
+use std::io::Write;
 use std::path::Path;
-use std::process::Command;
+use std::process::{Command, Stdio};
+use std::time::Duration;
 use tempfile::TempDir;
 
-/// Initialize a temporary git repository for testing
-fn init_git_repo(dir: &Path) -> Result<(), Box<dyn std::error::Error>> {
-    Command::new("git")
-        .args(["init"])
+/// Run a git command whose output isn't needed, failing unless it succeeds
+fn run_git(dir: &Path, args: &[&str]) -> Result<(), Box<dyn std::error::Error>> {
+    let status = Command::new("git")
+        .args(args)
         .current_dir(dir)
-        .output()?;
+        .stdout(Stdio::null())
+        .stderr(Stdio::null())
+        .status()?;
 
-    Command::new("git")
-        .args(["config", "user.name", "Test User"])
-        .current_dir(dir)
-        .output()?;
+    if !status.success() {
+        return Err(format!("git {} failed: {status}", args.join(" ")).into());
+    }
+    Ok(())
+}
 
-    Command::new("git")
-        .args(["config", "user.email", "test@example.com"])
-        .current_dir(dir)
-        .output()?;
+/// Initialize a temporary git repository for testing
+fn init_git_repo(dir: &Path) -> Result<(), Box<dyn std::error::Error>> {
+    run_git(dir, &["init"])?;
 
+    // Append the identity directly instead of spawning git config once per key
+    let mut config = fs::OpenOptions::new()
+        .append(true)
+        .open(dir.join(".git").join("config"))?;
+    config.write_all(b"[user]\n\tname = Test User\n\temail = test@example.com\n")?;
     Ok(())
 }
 
-/// Get the path to our compiled binary
-fn git_ignore_cmd() -> Command {
-    Command::cargo_bin("git-ignore").unwrap()
+/// Read an ignore file once and count how often each line occurs
+fn read_line_counts(path: &Path) -> Result<HashMap<String, usize>, Box<dyn std::error::Error>> {
+    let content = fs::read_to_string(path)?;
+    let mut counts = HashMap::new();
+    for line in content.lines() {
+        *counts.entry(line.to_string()).or_insert(0) += 1;
+    }
+    Ok(counts)
 }
 
-#[test]
-fn test_help_output() {
-    git_ignore_cmd()
-        .arg("--help")
-        .assert()
-        .success()
-        .stdout(predicate::str::contains("Add patterns to git ignore files"))
-        .stdout(predicate::str::contains("Usage: git-ignore"));
-}
+/// Upper bound on a single CLI invocation, so a hang fails the test quickly
+/// instead of stalling the whole run
+const CMD_TIMEOUT: Duration = Duration::from_secs(5);
 
-#[test]
-fn test_version_output() {
-    let expected_version = env!("CARGO_PKG_VERSION");
-    git_ignore_cmd()
-        .arg("--version")
-        .assert()
-        .success()
-        .stdout(predicate::str::contains(expected_version));
+/// Get the path to our compiled binary
+fn git_ignore_cmd() -> assert_cmd::Command {
+    let mut cmd = assert_cmd::Command::cargo_bin("git-ignore").unwrap();
+    cmd.timeout(CMD_TIMEOUT);
+    cmd
 }
 
 #[test]
@@ -64,10 +69,9 @@ fn test_add_to_gitignore() -> Result<(), Box<dyn std::error::Error>> {
         .stdout(predicate::str::contains("*.pyc"))
         .stdout(predicate::str::contains("__pycache__/"));
 
-    let gitignore_path = temp_dir.path().join(".gitignore");
-    let content = fs::read_to_string(gitignore_path)?;
-    assert!(content.contains("*.pyc"));
-    assert!(content.contains("__pycache__/"));
+    let counts = read_line_counts(&temp_dir.path().join(".gitignore"))?;
+    assert_eq!(counts.get("*.pyc"), Some(&1));
+    assert_eq!(counts.get("__pycache__/"), Some(&1));
 
     Ok(())
 }
@@ -136,8 +140,8 @@ fn test_local_exclude_file() -> Result<(), Box<dyn std::error::Error>> {
         ));
 
     let exclude_path = temp_dir.path().join(".git").join("info").join("exclude");
-    let content = fs::read_to_string(exclude_path)?;
-    assert!(content.contains("*.local"));
+    let counts = read_line_counts(&exclude_path)?;
+    assert_eq!(counts.get("*.local"), Some(&1));
 
     Ok(())
 }
@@ -247,6 +251,60 @@ fn test_pattern_warnings() -> Result<(), Box<dyn std::error::Error>> {
     Ok(())
 }
 
+#[test]
+fn test_pattern_sets_share_one_repo() -> Result<(), Box<dyn std::error::Error>> {
+    let temp_dir = TempDir::new()?;
+    init_git_repo(temp_dir.path())?;
+
+    let large: Vec<String> = (0..100).map(|i| format!("generated_{i}.tmp")).collect();
+    let cases: [(&str, Vec<String>); 4] = [
+        ("basic", vec!["*.pyc".into(), "build/".into()]),
+        (
+            "complex",
+            vec![
+                "**/node_modules/".into(),
+                "doc/**/*.pdf".into(),
+                "!keep.log".into(),
+            ],
+        ),
+        (
+            "special",
+            vec![
+                "file with spaces.txt".into(),
+                "\\#hash".into(),
+                "ünïcödé/".into(),
+            ],
+        ),
+        ("large", large),
+    ];
+
+    // The sets don't overlap, so each run adds every pattern it is given
+    for (_, patterns) in &cases {
+        git_ignore_cmd()
+            .args(patterns)
+            .current_dir(temp_dir.path())
+            .assert()
+            .success()
+            .stdout(predicate::str::contains(format!(
+                "Added {} patterns to .gitignore (",
+                patterns.len()
+            )));
+    }
+
+    let counts = read_line_counts(&temp_dir.path().join(".gitignore"))?;
+    for (name, patterns) in &cases {
+        for pattern in patterns {
+            assert_eq!(
+                counts.get(pattern),
+                Some(&1),
+                "{name}: {pattern} should appear exactly once in .gitignore"
+            );
+        }
+    }
+
+    Ok(())
+}
+
 #[test]
 fn test_info_exclude_template() -> Result<(), Box<dyn std::error::Error>> {
     let temp_dir = TempDir::new()?;
@@ -300,6 +358,34 @@ fn test_trailing_slash_treated_as_duplicate() -> Result<(), Box<dyn std::error::
     Ok(())
 }
 
+#[test]
+fn test_core_worktree_is_respected() -> Result<(), Box<dyn std::error::Error>> {
+    let temp_dir = TempDir::new()?;
+    let repo = temp_dir.path().join("repo");
+    let work_tree = temp_dir.path().join("work");
+    fs::create_dir_all(&repo)?;
+    fs::create_dir_all(&work_tree)?;
+    init_git_repo(&repo)?;
+    run_git(
+        &repo,
+        &["config", "core.worktree", work_tree.to_str().unwrap()],
+    )?;
+
+    // git puts the top level at core.worktree, not next to .git
+    git_ignore_cmd()
+        .args(["*.pyc"])
+        .current_dir(&repo)
+        .assert()
+        .success()
+        .stdout(predicate::str::contains("Added 1 pattern to .gitignore ("));
+
+    let counts = read_line_counts(&work_tree.join(".gitignore"))?;
+    assert_eq!(counts.get("*.pyc"), Some(&1));
+    assert!(!repo.join(".gitignore").exists());
+
+    Ok(())
+}
+
 #[test]
 fn test_local_exclude_file_in_worktree_is_respected_by_git_status(
 ) -> Result<(), Box<dyn std::error::Error>> {
@@ -309,14 +395,8 @@ fn test_local_exclude_file_in_worktree_is_respected_by_git_status(
     init_git_repo(&main_repo)?;
 
     fs::write(main_repo.join("README.md"), "test")?;
-    Command::new("git")
-        .args(["add", "."])
-        .current_dir(&main_repo)
-        .output()?;
-    Command::new("git")
-        .args(["commit", "-m", "initial commit"])
-        .current_dir(&main_repo)
-        .output()?;
+    run_git(&main_repo, &["add", "."])?;
+    run_git(&main_repo, &["commit", "-m", "initial commit"])?;
 
     let worktree_dir = temp_dir.path().join("worktree");
     let worktree_output = Command::new("git")